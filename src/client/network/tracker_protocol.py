@@ -1,23 +1,116 @@
 import socket
-import json
+import struct
+import queue
+import orjson
 import logging
 from typing import Dict, Any, Optional, Tuple, List
 
+# Every message on the wire is prefixed with its length as a 4-byte big-endian integer
+HEADER = struct.Struct('>I')
+
+def _recv_exact(sock: socket.socket, size: int) -> bytearray:
+    """Read exactly size bytes from a socket into a preallocated buffer
+    
+    Raises:
+        ConnectionError: If the connection is closed before size bytes arrive
+    """
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    offset = 0
+    while offset < size:
+        received = sock.recv_into(view[offset:])
+        if not received:
+            raise ConnectionError("Connection closed by tracker")
+        offset += received
+    return buffer
+
+def _send_frame(sock: socket.socket, payload: bytes):
+    """Send a length-prefixed payload without concatenating header and body
+    
+    On platforms with sendmsg the header and payload are handed to the kernel
+    as two buffers in one call; anything left after a partial write is sent
+    with sendall.
+    """
+    header = HEADER.pack(len(payload))
+    if not hasattr(sock, 'sendmsg'):
+        sock.sendall(header)
+        sock.sendall(payload)
+        return
+    sent = sock.sendmsg([header, payload])
+    if sent < len(header):
+        sock.sendall(header[sent:])
+        sock.sendall(payload)
+    elif sent < len(header) + len(payload):
+        sock.sendall(memoryview(payload)[sent - len(header):])
+
 class TrackerProtocol:
-    def __init__(self, tracker_host: str, tracker_port: int):
+    def __init__(self, tracker_host: str, tracker_port: int, pool_size: int = 4):
         """Initialize the tracker protocol handler
         
         Args:
             tracker_host (str): Hostname or IP of the tracker server
             tracker_port (int): Port number of the tracker server
+            pool_size (int): Maximum number of idle connections kept open
         """
         self.tracker_host = tracker_host
         self.tracker_port = tracker_port
         self.logger = logging.getLogger('TrackerProtocol')
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        
+    def _create_connection(self) -> socket.socket:
+        """Open a new connection to the tracker
+        
+        Returns:
+            socket.socket: Connected socket with keep-alive enabled
+        """
+        sock = socket.create_connection((self.tracker_host, self.tracker_port), timeout=10)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        return sock
+        
+    def _acquire_connection(self) -> socket.socket:
+        """Take an idle connection from the pool, or open a new one"""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._create_connection()
+            
+    def _release_connection(self, sock: socket.socket):
+        """Return a healthy connection to the pool for reuse"""
+        try:
+            self._pool.put_nowait(sock)
+        except queue.Full:
+            sock.close()
+            
+    def close(self):
+        """Close all pooled connections to the tracker"""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+                
+    def _exchange(self, sock: socket.socket, payload: bytes) -> bytearray:
+        """Send one framed request and read back one framed response
+        
+        Args:
+            sock (socket.socket): Connected socket
+            payload (bytes): Encoded request body
+            
+        Returns:
+            bytearray: Encoded response body
+        """
+        _send_frame(sock, payload)
+        (length,) = HEADER.unpack(_recv_exact(sock, HEADER.size))
+        return _recv_exact(sock, length)
         
     def _send_request(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Send a request to the tracker and return the response
         
+        Requests are sent over a pooled persistent connection using
+        length-prefixed framing. A connection that turns out to be stale is
+        discarded and the request is retried once on a fresh connection.
+        
         Args:
             data (Dict[str, Any]): JSON-serializable request data
             
@@ -29,49 +122,34 @@ class TrackerProtocol:
             TimeoutError: If tracker doesn't respond in time
             ValueError: If response parsing fails
         """
-        try:
-            # Create a socket for the request
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(10)  # 10 second timeout
-            
-            # Connect to the tracker
-            sock.connect((self.tracker_host, self.tracker_port))
-            
-            # Send the request
-            request_data = json.dumps(data).encode('utf-8')
-            sock.sendall(request_data)
-            
-            # Receive the response
-            response_data = b''
-            while True:
-                chunk = sock.recv(4096)
-                if not chunk:
-                    break
-                response_data += chunk
+        request_data = orjson.dumps(data)
+        
+        for attempt in range(2):
+            sock = None
+            try:
+                sock = self._acquire_connection()
+                response_data = self._exchange(sock, request_data)
+                self._release_connection(sock)
+                break
+            except socket.timeout:
+                if sock:
+                    sock.close()
+                self.logger.error("Connection to tracker timed out")
+                raise TimeoutError("Connection to tracker timed out")
+            except (socket.error, ConnectionError) as e:
+                if sock:
+                    sock.close()
+                if attempt == 0:
+                    continue
+                self.logger.error(f"Socket error connecting to tracker: {str(e)}")
+                raise ConnectionError(f"Failed to connect to tracker: {str(e)}")
                 
-                # Check if we've received a complete JSON object
-                try:
-                    decoded_data = response_data.decode('utf-8')
-                    json.loads(decoded_data)  # Test if valid JSON
-                    break  # If we can parse it, we've received the full message
-                except (json.JSONDecodeError, UnicodeDecodeError):
-                    continue  # Not complete JSON, wait for more data
-            
-            # Parse the response
-            response = json.loads(response_data.decode('utf-8'))
-            return response
-            
-        except socket.timeout:
-            self.logger.error("Connection to tracker timed out")
-            raise TimeoutError("Connection to tracker timed out")
-        except socket.error as e:
-            self.logger.error(f"Socket error connecting to tracker: {str(e)}")
-            raise ConnectionError(f"Failed to connect to tracker: {str(e)}")
-        except json.JSONDecodeError as e:
+        # Parse the response
+        try:
+            return orjson.loads(response_data)
+        except orjson.JSONDecodeError as e:
             self.logger.error(f"Failed to parse tracker response: {str(e)}")
             raise ValueError(f"Invalid response from tracker: {str(e)}")
-        finally:
-            sock.close()
     
     def submit_info(self, port: int, username: str, session_id: Optional[str] = None) -> Dict[str, Any]:
         """Submit peer information to the tracker
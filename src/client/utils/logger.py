@@ -1,9 +1,14 @@
 import os
+import atexit
+import queue
 import logging
-import datetime
-from logging.handlers import RotatingFileHandler
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from typing import Dict, Any, Optional
 
+# Bytes read at a time when counting existing log entries
+COUNT_CHUNK_SIZE = 1024 * 1024
+
 class RotatingFileLogger:
     """A logger with rotating file capability that's limited to 10K entries"""
     
@@ -24,6 +29,11 @@ class RotatingFileLogger:
         self.max_bytes = max_bytes
         self.max_entries = max_entries
         self.entry_count = 0
+        self._second_cache = (None, '')  # (epoch second, formatted second) for timestamps
+        self._listener = None  # Background thread writing queued records to the file
+        # The queue and its handler outlive rotations; only the listener and file handler are replaced
+        self._queue = queue.Queue(-1)
+        self._queue_handler = QueueHandler(self._queue)
         
         # Create log directory if it doesn't exist
         os.makedirs(log_dir, exist_ok=True)
@@ -35,13 +45,35 @@ class RotatingFileLogger:
         # Set up handler
         self._setup_handler()
         
+        # Write out any queued records when the application exits
+        atexit.register(self.close)
+        
+    def _stop_listener(self):
+        """Stop the queue listener, flushing queued records and closing the file"""
+        if self._listener is not None:
+            self._listener.stop()
+            for handler in self._listener.handlers:
+                handler.close()
+            self._listener = None
+            
+    def close(self):
+        """Flush all pending log records to disk and close the log file"""
+        self._stop_listener()
+        
     def _setup_handler(self):
-        """Set up the rotating file handler"""
+        """Set up the rotating file handler
+        
+        Records are written by a QueueListener thread; the logger itself only
+        has a QueueHandler, so logging calls never wait on disk I/O. Records
+        logged while the file handler is being replaced stay in the queue and
+        are written by the next listener.
+        """
         log_path = os.path.join(self.log_dir, self.filename)
         
         # Remove existing handlers if any
-        if self.logger.handlers:
-            for handler in self.logger.handlers:
+        self._stop_listener()
+        for handler in list(self.logger.handlers):
+            if handler is not self._queue_handler:
                 self.logger.removeHandler(handler)
                 
         # Create a rotating file handler
@@ -55,16 +87,19 @@ class RotatingFileLogger:
         formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         handler.setFormatter(formatter)
         
-        # Add the handler to the logger
-        self.logger.addHandler(handler)
+        # Drain queued records to the file handler from a background thread
+        self._listener = QueueListener(self._queue, handler)
+        self._listener.start()
+        if self._queue_handler not in self.logger.handlers:
+            self.logger.addHandler(self._queue_handler)
         
         # Log the initialization
         self.logger.info(f"Logger initialized with max {self.max_entries} entries")
         
-        # Count current entries (approximate)
+        # Count current entries (approximate) by scanning the raw bytes for newlines
         try:
-            with open(log_path, 'r') as f:
-                self.entry_count = sum(1 for _ in f)
+            with open(log_path, 'rb') as f:
+                self.entry_count = sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(COUNT_CHUNK_SIZE), b''))
         except FileNotFoundError:
             self.entry_count = 0
         
@@ -82,28 +117,45 @@ class RotatingFileLogger:
             
         # Add timestamp and session ID to details
         log_details = details.copy()
-        log_details['timestamp'] = datetime.datetime.now().isoformat()
+        log_details['timestamp'] = self._timestamp()
         
         if session_id:
             log_details['session_id'] = session_id
             
         # Format the message
-        message = f"EVENT={event_type}"
-        for key, value in log_details.items():
-            message += f" | {key}={value}"
+        fields = [f"EVENT={event_type}"]
+        fields.extend(f"{key}={value}" for key, value in log_details.items())
+        message = " | ".join(fields)
             
         # Log the message
         self.logger.info(message)
         self.entry_count += 1
         
+    def _timestamp(self) -> str:
+        """Get the current local time in ISO 8601 format with microseconds
+        
+        The date and time up to the second are only reformatted when the
+        second changes; events within the same second reuse the cached string.
+        
+        Returns:
+            str: Timestamp such as 2024-01-31T12:34:56.123456
+        """
+        now = time.time()
+        second = int(now)
+        cached_second, formatted = self._second_cache
+        if second != cached_second:
+            formatted = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(second))
+            self._second_cache = (second, formatted)
+        return f"{formatted}.{int((now - second) * 1000000):06d}"
+        
     def _rotate_by_entries(self):
         """Rotate the log file when entry count exceeds the maximum"""
         log_path = os.path.join(self.log_dir, self.filename)
         backup_path = f"{log_path}.1"
         
-        # Close existing handlers
-        for handler in self.logger.handlers:
-            handler.close()
+        # Write out queued records and close the file; records logged from
+        # here on wait in the queue for the new file's listener
+        self._stop_listener()
             
         # Rename current log file to backup
         if os.path.exists(log_path):
@@ -1,8 +1,44 @@
 import os
-import json
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
-from typing import Dict, Any, List, Optional
+import heapq
+import itertools
+import operator
+import zlib
+from typing import Dict, Any, Hashable, Iterable, Iterator, List, Optional
+
+# Seconds to wait for the server API before giving up on a request
+REQUEST_TIMEOUT = 5
+
+def _message_key(message: Dict[str, Any]) -> Hashable:
+    """Identify a message by message_id if available, otherwise by timestamp + sender"""
+    message_id = message.get('message_id')
+    if message_id is not None:
+        return message_id
+    return (message.get('timestamp'), message.get('sender_id'))
+
+def _timestamp_key(message: Dict[str, Any]) -> str:
+    """Sort key ordering messages chronologically"""
+    return message.get('timestamp', '')
+
+def _gzip_ndjson(messages: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """Encode messages as a gzip-compressed NDJSON stream, one message at a time"""
+    compressor = zlib.compressobj(wbits=31)  # wbits=31 selects the gzip container
+    for message in messages:
+        chunk = compressor.compress(orjson.dumps(message, option=orjson.OPT_APPEND_NEWLINE))
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+def _chronological(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Return messages in timestamp order, only sorting if they are not already"""
+    timestamps = list(map(_timestamp_key, messages))
+    if all(map(operator.le, timestamps, timestamps[1:])):
+        return messages
+    return sorted(messages, key=_timestamp_key)
 
 class SyncManager:
     """Manages synchronization of channel content between local cache and server"""
@@ -18,21 +54,120 @@ class SyncManager:
         self.cache_dir = cache_dir
         self.logger = logging.getLogger('SyncManager')
         
+        # Reuse keep-alive connections to the server across sync calls. Read
+        # errors are only retried for idempotent methods (never the POST
+        # upload), connection errors are retried before anything is sent, and
+        # redirects are not retried since a streamed body cannot be replayed.
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.1,
+                redirect=False,
+                allowed_methods=Retry.DEFAULT_ALLOWED_METHODS
+            )
+        )
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        
         # Create cache directory if it doesn't exist
         os.makedirs(cache_dir, exist_ok=True)
         os.makedirs(os.path.join(cache_dir, 'channels'), exist_ok=True)
         
+    def close(self):
+        """Close pooled connections to the server"""
+        self._session.close()
+        
     def _get_channel_cache_path(self, channel_id: str) -> str:
         """Get the path to the cache file for a channel
         
+        The cache is stored as JSON Lines (one message per line) so new
+        messages can be appended without rewriting the file.
+        
         Args:
             channel_id (str): ID of the channel
             
         Returns:
             str: Path to the cache file
         """
+        return os.path.join(self.cache_dir, 'channels', f"{channel_id}.jsonl")
+        
+    def _get_legacy_cache_path(self, channel_id: str) -> str:
+        """Get the path to a channel cache in the old single JSON array format
+        
+        Args:
+            channel_id (str): ID of the channel
+            
+        Returns:
+            str: Path to the legacy cache file
+        """
         return os.path.join(self.cache_dir, 'channels', f"{channel_id}.json")
         
+    def _migrate_legacy_cache(self, channel_id: str):
+        """Convert a legacy JSON array cache for a channel to JSON Lines
+        
+        Messages from the legacy file are placed before any already in the
+        JSON Lines cache, and the legacy file is removed once rewritten.
+        
+        Args:
+            channel_id (str): ID of the channel
+        """
+        legacy_path = self._get_legacy_cache_path(channel_id)
+        if not os.path.exists(legacy_path):
+            return
+        try:
+            with open(legacy_path, 'rb') as f:
+                messages = orjson.loads(f.read())
+        except orjson.JSONDecodeError as e:
+            self.logger.error(f"Cannot migrate corrupt cache for channel {channel_id}: {str(e)}")
+            return
+        if not isinstance(messages, list):
+            self.logger.error(f"Cannot migrate cache for channel {channel_id}: expected a JSON array")
+            return
+        messages.extend(self._read_channel_cache(channel_id))
+        self._save_channel_cache(channel_id, messages)
+        os.remove(legacy_path)
+        self.logger.info(f"Migrated {len(messages)} cached messages for channel {channel_id} to JSON Lines")
+        
+    def _iter_channel_cache(self, channel_id: str) -> Iterator[Dict[str, Any]]:
+        """Stream cached messages for a channel one line at a time
+        
+        A legacy JSON array cache is converted to JSON Lines first.
+        
+        Args:
+            channel_id (str): ID of the channel
+            
+        Yields:
+            Dict[str, Any]: Cached messages in the order they were written
+        """
+        self._migrate_legacy_cache(channel_id)
+        yield from self._read_channel_cache(channel_id)
+        
+    def _read_channel_cache(self, channel_id: str) -> Iterator[Dict[str, Any]]:
+        """Stream messages from the JSON Lines cache file of a channel
+        
+        Args:
+            channel_id (str): ID of the channel
+            
+        Yields:
+            Dict[str, Any]: Cached messages in the order they were written
+        """
+        cache_path = self._get_channel_cache_path(channel_id)
+        try:
+            with open(cache_path, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        yield orjson.loads(line)
+                    except orjson.JSONDecodeError:
+                        # Skip a partially written line rather than losing the whole cache
+                        self.logger.warning(f"Skipping corrupt cache entry for channel {channel_id}")
+        except FileNotFoundError:
+            return
+            
     def _load_channel_cache(self, channel_id: str) -> List[Dict[str, Any]]:
         """Load cached messages for a channel
         
@@ -42,23 +177,18 @@ class SyncManager:
         Returns:
             List[Dict[str, Any]]: List of cached messages
         """
-        cache_path = self._get_channel_cache_path(channel_id)
-        try:
-            with open(cache_path, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
+        return list(self._iter_channel_cache(channel_id))
             
     def _save_channel_cache(self, channel_id: str, messages: List[Dict[str, Any]]):
-        """Save messages to the channel cache
+        """Rewrite the channel cache with the given messages
         
         Args:
             channel_id (str): ID of the channel
             messages (List[Dict[str, Any]]): List of messages to cache
         """
         cache_path = self._get_channel_cache_path(channel_id)
-        with open(cache_path, 'w') as f:
-            json.dump(messages, f)
+        with open(cache_path, 'wb') as f:
+            f.writelines(orjson.dumps(message, option=orjson.OPT_APPEND_NEWLINE) for message in messages)
             
     def _get_server_messages(self, user_id: str, channel_id: str) -> List[Dict[str, Any]]:
         """Get messages from the server API
@@ -72,7 +202,7 @@ class SyncManager:
         """
         url = f"{self.server_base_url}/users/{user_id}/channels/{channel_id}/messages"
         try:
-            response = requests.get(url)
+            response = self._session.get(url, timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -80,21 +210,34 @@ class SyncManager:
             return []
             
     def _post_messages_to_server(self, user_id: str, channel_id: str, 
-                               messages: List[Dict[str, Any]]) -> bool:
+                               messages: Iterable[Dict[str, Any]]) -> bool:
         """Post messages to the server API
         
+        The body is streamed as gzip-compressed NDJSON, encoding one message
+        at a time so memory use does not grow with the number of messages.
+        
         Args:
             user_id (str): ID of the user
             channel_id (str): ID of the channel
-            messages (List[Dict[str, Any]]): List of messages to post
+            messages (Iterable[Dict[str, Any]]): Messages to post
             
         Returns:
             bool: True if successful, False otherwise
         """
         url = f"{self.server_base_url}/users/{user_id}/channels/{channel_id}/messages"
         try:
-            response = requests.post(url, json={"messages": messages})
+            response = self._session.post(
+                url,
+                data=_gzip_ndjson(messages),
+                headers={'Content-Type': 'application/x-ndjson', 'Content-Encoding': 'gzip'},
+                timeout=REQUEST_TIMEOUT,
+                allow_redirects=False
+            )
             response.raise_for_status()
+            if response.is_redirect:
+                # The streamed body has been consumed and cannot be re-sent
+                self.logger.error(f"Server redirected message upload to {response.headers.get('Location')}")
+                return False
             return True
         except requests.exceptions.RequestException as e:
             self.logger.error(f"Error posting messages to server: {str(e)}")
@@ -104,6 +247,8 @@ class SyncManager:
         """Synchronize channel content to the server when going offline
         
         This function uploads all cached messages to the server before going offline.
+        Messages are read from the cache file as they are sent, so the whole
+        channel history is never held in memory.
         
         Args:
             user_id (str): ID of the user
@@ -114,17 +259,27 @@ class SyncManager:
         """
         self.logger.info(f"Syncing offline for channel {channel_id}")
         
-        # Load cached messages
-        cached_messages = self._load_channel_cache(channel_id)
-        if not cached_messages:
+        # Stream cached messages from disk, peeking at the first so an empty
+        # cache does not trigger a request
+        cached_messages = self._iter_channel_cache(channel_id)
+        first = next(cached_messages, None)
+        if first is None:
             self.logger.info(f"No cached messages for channel {channel_id}")
             return True
             
+        count = 0
+        
+        def counted_messages():
+            nonlocal count
+            for message in itertools.chain((first,), cached_messages):
+                count += 1
+                yield message
+                
         # Post cached messages to server
-        success = self._post_messages_to_server(user_id, channel_id, cached_messages)
+        success = self._post_messages_to_server(user_id, channel_id, counted_messages())
         
         if success:
-            self.logger.info(f"Successfully synced {len(cached_messages)} messages to server")
+            self.logger.info(f"Successfully synced {count} messages to server")
         
         return success
         
@@ -149,26 +304,19 @@ class SyncManager:
         # Load cached messages
         cached_messages = self._load_channel_cache(channel_id)
         
-        # Merge messages
-        # Use message_id as unique identifier if available, otherwise use timestamp + sender
-        merged_messages = []
-        message_ids = set()
-        
-        # First add all server messages
-        for msg in server_messages:
-            identifier = msg.get('message_id', f"{msg.get('timestamp')}:{msg.get('sender_id')}")
-            message_ids.add(identifier)
-            merged_messages.append(msg)
-            
-        # Then add any cached messages not in server
+        # Keep the server copy when a message exists in both
+        seen = set(map(_message_key, server_messages))
+        unsynced_messages = []
         for msg in cached_messages:
-            identifier = msg.get('message_id', f"{msg.get('timestamp')}:{msg.get('sender_id')}")
-            if identifier not in message_ids:
-                merged_messages.append(msg)
-                message_ids.add(identifier)
+            identifier = _message_key(msg)
+            if identifier not in seen:
+                seen.add(identifier)
+                unsynced_messages.append(msg)
                 
-        # Sort by timestamp
-        merged_messages.sort(key=lambda x: x.get('timestamp', ''))
+        # Both sides are normally already in timestamp order, so a linear merge replaces a full sort
+        merged_messages = list(heapq.merge(
+            _chronological(server_messages), _chronological(unsynced_messages), key=_timestamp_key
+        ))
         
         # Update cache
         self._save_channel_cache(channel_id, merged_messages)
@@ -183,9 +331,10 @@ class SyncManager:
             channel_id (str): ID of the channel
             message (Dict[str, Any]): Message to cache
         """
-        messages = self._load_channel_cache(channel_id)
-        messages.append(message)
-        self._save_channel_cache(channel_id, messages)
+        self._migrate_legacy_cache(channel_id)
+        cache_path = self._get_channel_cache_path(channel_id)
+        with open(cache_path, 'ab') as f:
+            f.write(orjson.dumps(message, option=orjson.OPT_APPEND_NEWLINE))
         
     def clear_cache(self, channel_id: Optional[str] = None):
         """Clear the cache for a channel or all channels
@@ -194,12 +343,16 @@ class SyncManager:
             channel_id (Optional[str]): ID of the channel to clear, or None for all channels
         """
         if channel_id:
-            cache_path = self._get_channel_cache_path(channel_id)
-            if os.path.exists(cache_path):
-                os.remove(cache_path)
+            cleared = False
+            for cache_path in (self._get_channel_cache_path(channel_id),
+                               self._get_legacy_cache_path(channel_id)):
+                if os.path.exists(cache_path):
+                    os.remove(cache_path)
+                    cleared = True
+            if cleared:
                 self.logger.info(f"Cleared cache for channel {channel_id}")
         else:
             for filename in os.listdir(os.path.join(self.cache_dir, 'channels')):
-                if filename.endswith('.json'):
+                if filename.endswith(('.jsonl', '.json')):
                     os.remove(os.path.join(self.cache_dir, 'channels', filename))
             self.logger.info("Cleared cache for all channels")
\ No newline at end of file
@@ -1,10 +1,15 @@
 import os
-import json
+import atexit
+import orjson
 import threading
 import logging
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 
+# Seconds peer changes are batched before peers.json is rewritten and fsynced.
+# Clean exits flush through close(), so this only bounds what a crash can lose.
+PEER_FLUSH_INTERVAL = 0.5
+
 class DataManager:
     """Manages data storage and retrieval for the server"""
     
@@ -18,6 +23,7 @@ class DataManager:
         self.peers_path = os.path.join(data_dir, 'peers.json')
         self.backup_messages_path = os.path.join(data_dir, 'backup_messages.json')
         self.lock = threading.Lock()  # For thread safety
+        self.write_lock = threading.Lock()  # Serializes snapshot-and-write of peers.json
         
         # Set up logging
         self.logger = logging.getLogger('DataManager')
@@ -27,27 +33,40 @@ class DataManager:
         
         # Initialize data files if they don't exist
         if not os.path.exists(self.peers_path):
-            self.save_peers({})
+            self._write_peers_file({})
             
         if not os.path.exists(self.backup_messages_path):
             self.save_backup({})
             
-    def load_peers(self) -> Dict[str, Dict[str, Any]]:
-        """Load peer data from peers.json
+        # Peers are served from memory and flushed to disk in the background
+        self._peers = self._read_peers_file()
+        self._dirty = False
+        self._stop_event = threading.Event()
+        self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flush_thread.start()
+        
+        # Save pending peer changes when the application exits
+        atexit.register(self.close)
+            
+    def _read_peers_file(self) -> Dict[str, Dict[str, Any]]:
+        """Read peer data from peers.json on disk
         
         Returns:
             Dict[str, Dict[str, Any]]: Dictionary of peer information
         """
         try:
-            with self.lock:
-                with open(self.peers_path, 'r') as f:
-                    return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
+            with open(self.peers_path, 'rb') as f:
+                return orjson.loads(f.read())
+        except (FileNotFoundError, orjson.JSONDecodeError) as e:
             self.logger.error(f"Error loading peers: {str(e)}")
             return {}
             
-    def save_peers(self, peers: Dict[str, Dict[str, Any]]) -> bool:
-        """Save peer data to peers.json
+    def _write_peers_file(self, peers: Dict[str, Dict[str, Any]]) -> bool:
+        """Write peer data to peers.json on disk
+        
+        The data is written and fsynced to a temporary file which then
+        atomically replaces peers.json, so a crash mid-write never leaves a
+        truncated file behind.
         
         Args:
             peers (Dict[str, Dict[str, Any]]): Dictionary of peer information
@@ -56,17 +75,83 @@ class DataManager:
             bool: True if successful, False otherwise
         """
         try:
-            with self.lock:
-                with open(self.peers_path, 'w') as f:
-                    json.dump(peers, f, indent=2)
+            tmp_path = self.peers_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(peers))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.peers_path)
             self.logger.info(f"Saved {len(peers)} peers to {self.peers_path}")
             return True
         except Exception as e:
             self.logger.error(f"Error saving peers: {str(e)}")
             return False
             
+    def load_peers(self) -> Dict[str, Dict[str, Any]]:
+        """Get a copy of the current peer data
+        
+        Peers are kept in memory; peers.json is only read once at startup.
+        Each peer's information is copied too, so editing the result never
+        changes the stored peers behind the flusher's back.
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: Dictionary of peer information
+        """
+        with self.lock:
+            return {peer_id: dict(peer_info) for peer_id, peer_info in self._peers.items()}
+            
+    def save_peers(self, peers: Dict[str, Dict[str, Any]]) -> bool:
+        """Replace all peer data and save it to peers.json immediately
+        
+        Args:
+            peers (Dict[str, Dict[str, Any]]): Dictionary of peer information
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        with self.lock:
+            self._peers = {peer_id: dict(peer_info) for peer_id, peer_info in peers.items()}
+            self._dirty = True
+        return self.flush_peers()
+        
+    def flush_peers(self) -> bool:
+        """Save peer data to peers.json if it changed since the last save
+        
+        The snapshot is taken and written under write_lock, so concurrent
+        flushes reach the disk in the order their snapshots were taken and
+        an older snapshot can never overwrite a newer one.
+        
+        Returns:
+            bool: True if nothing needed saving or the save succeeded
+        """
+        with self.write_lock:
+            with self.lock:
+                if not self._dirty:
+                    return True
+                snapshot = dict(self._peers)
+                self._dirty = False
+            if self._write_peers_file(snapshot):
+                return True
+            with self.lock:
+                self._dirty = True
+            return False
+        
+    def _flush_loop(self):
+        """Periodically flush changed peer data to disk until closed"""
+        while not self._stop_event.wait(PEER_FLUSH_INTERVAL):
+            self.flush_peers()
+            
+    def close(self):
+        """Stop the background flusher and save any pending peer changes"""
+        self._stop_event.set()
+        self._flush_thread.join()
+        self.flush_peers()
+            
     def add_peer(self, peer_id: str, peer_info: Dict[str, Any]) -> bool:
-        """Add or update a peer in peers.json
+        """Add or update a peer
+        
+        The change is made in memory and saved to peers.json by the
+        background flusher.
         
         Args:
             peer_id (str): Unique ID for the peer
@@ -75,19 +160,16 @@ class DataManager:
         Returns:
             bool: True if successful, False otherwise
         """
-        try:
-            peers = self.load_peers()
-            
-            # Update or add the peer
-            with self.lock:
-                peers[peer_id] = peer_info
-                return self.save_peers(peers)
-        except Exception as e:
-            self.logger.error(f"Error adding peer {peer_id}: {str(e)}")
-            return False
+        with self.lock:
+            self._peers[peer_id] = dict(peer_info)
+            self._dirty = True
+        return True
             
     def remove_peer(self, peer_id: str) -> bool:
-        """Remove a peer from peers.json
+        """Remove a peer
+        
+        The change is made in memory and saved to peers.json by the
+        background flusher. Removing an unknown peer leaves nothing to save.
         
         Args:
             peer_id (str): Unique ID for the peer
@@ -95,17 +177,11 @@ class DataManager:
         Returns:
             bool: True if successful, False otherwise
         """
-        try:
-            peers = self.load_peers()
-            
-            with self.lock:
-                if peer_id in peers:
-                    del peers[peer_id]
-                    return self.save_peers(peers)
-                return True  # Peer not found, but not an error
-        except Exception as e:
-            self.logger.error(f"Error removing peer {peer_id}: {str(e)}")
-            return False
+        with self.lock:
+            if peer_id in self._peers:
+                del self._peers[peer_id]
+                self._dirty = True
+        return True  # Peer not found is not an error
             
     def load_backup_messages(self) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
         """Load backup messages from backup_messages.json"""
\ No newline at end of file
@@ -1,160 +1,303 @@
+import os
+import asyncio
 import socket
-import json
-import threading
+import orjson
+import atexit
+import queue
 import logging
+from logging.handlers import QueueHandler, QueueListener
+import struct
+import secrets
+import threading
 from datetime import datetime
 
+try:
+    import uvloop
+except ImportError:  # uvloop is optional; fall back to the default asyncio event loop
+    uvloop = None
+
+# Every message on the wire is prefixed with its length as a 4-byte big-endian integer
+HEADER = struct.Struct('>I')
+# Seconds a persistent client connection may stay idle before it is closed
+IDLE_TIMEOUT = 60
+# Maximum number of pending connections queued by the kernel
+LISTEN_BACKLOG = 1024
+# Maximum number of client connections served at the same time
+MAX_CONNECTIONS = 4096
+# Largest request body in bytes the tracker will read
+MAX_MESSAGE_SIZE = 1024 * 1024
+# Seconds between background saves of changed peers to peers.json
+FLUSH_INTERVAL = 0.5
+# Constant error responses, serialized once and sent as-is
+UNKNOWN_COMMAND_RESPONSE = orjson.dumps({"status": "error", "message": "Unknown command"})
+INVALID_JSON_RESPONSE = orjson.dumps({"status": "error", "message": "Invalid JSON format"})
+
 class Tracker:
     def __init__(self, host='0.0.0.0', port=8000):
         self.host = host
         self.port = port
-        self.server_socket = None
+        self.server = None
         self.peers = {}  # Format: {peer_id: {'ip': ip, 'port': port, 'username': username, 'session_id': session_id}}
-        self.lock = threading.Lock()  # For thread safety
+        self._dirty = False  # Set when peers changed since the last save
+        self._peer_list_cache = None  # Serialized get_list response, cleared when peers change
+        self._peer_ids = {}  # (ip, port, username, session_id) -> peer_id, so re-registrations keep their ID
+        self._loop = None
+        self._stopping = None
+        self._save_lock = threading.Lock()  # Serializes peers.json writes across worker threads
+        self._connection_count = 0
+        self._clients = {}  # Handler task -> StreamWriter for every open client connection
+        # Command name -> handler
+        self.dispatch = {
+            'submit_info': self.handle_submit_info,
+            'get_list': self.handle_get_list,
+        }
         self.setup_logging()
         
     def setup_logging(self):
-        logging.basicConfig(
-            filename='tracker.log',
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
+        """Log to tracker.log through a queue drained by a background thread
+        
+        Request handlers only enqueue records, so they never wait on the
+        log file. Like logging.basicConfig, nothing changes if the root
+        logger is already configured.
+        """
+        root_logger = logging.getLogger()
+        if not root_logger.handlers:
+            file_handler = logging.FileHandler('tracker.log')
+            file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+            log_queue = queue.Queue(-1)
+            listener = QueueListener(log_queue, file_handler)
+            listener.start()
+            atexit.register(listener.stop)  # Write out queued records on exit
+            root_logger.addHandler(QueueHandler(log_queue))
+            root_logger.setLevel(logging.INFO)
         self.logger = logging.getLogger('Tracker')
         
-    def save_peers(self):
-        """Save current peer list to peers.json"""
-        with open('peers.json', 'w') as f:
-            json.dump(self.peers, f)
-        self.logger.info(f"Saved {len(self.peers)} peers to peers.json")
+    def save_peers(self, peers=None):
+        """Save a peer list (the current one by default) to peers.json
+        
+        The file is written to a temporary path first and then renamed over
+        peers.json, so a crash mid-write never leaves a truncated file.
+        """
+        if peers is None:
+            peers = self.peers
+        tmp_path = 'peers.json.tmp'
+        with self._save_lock:
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(peers))
+            os.replace(tmp_path, 'peers.json')
+        self.logger.info("Saved %d peers to peers.json", len(peers))
+        
+    async def flush_peers(self):
+        """Save peers to disk if they changed since the last save
+        
+        The peer list is snapshotted on the event loop and written from a
+        worker thread, so request handling never waits on disk I/O.
+        """
+        if not self._dirty:
+            return
+        snapshot = dict(self.peers)
+        self._dirty = False
+        try:
+            await asyncio.to_thread(self.save_peers, snapshot)
+        except OSError as e:
+            self.logger.error("Error saving peers: %s", e)
+            self._dirty = True
+            
+    async def _flush_loop(self):
+        """Periodically flush changed peers to disk until the tracker stops"""
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            await self.flush_peers()
             
     def load_peers(self):
         """Load peers from peers.json if exists"""
         try:
-            with open('peers.json', 'r') as f:
-                self.peers = json.load(f)
-            self.logger.info(f"Loaded {len(self.peers)} peers from peers.json")
+            with open('peers.json', 'rb') as f:
+                self.peers = orjson.loads(f.read())
+            self._peer_ids = {
+                (info.get('ip'), info.get('port'), info.get('username'), info.get('session_id')): peer_id
+                for peer_id, info in self.peers.items()
+            }
+            self._peer_list_cache = None
+            self.logger.info("Loaded %d peers from peers.json", len(self.peers))
         except FileNotFoundError:
             self.logger.info("No existing peers.json found, starting with empty peer list")
             
-    def start(self):
-        """Start the tracker server"""
+    async def serve(self):
+        """Run the tracker on the current event loop until stop() is called"""
         self.load_peers()
-        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
         
         try:
-            self.server_socket.bind((self.host, self.port))
-            self.server_socket.listen(5)
-            self.logger.info(f"Tracker started on {self.host}:{self.port}")
-            
-            while True:
-                client_socket, addr = self.server_socket.accept()
-                self.logger.info(f"New connection from {addr[0]}:{addr[1]}")
-                
-                # Handle client connection in a new thread
-                client_thread = threading.Thread(
-                    target=self.handle_client,
-                    args=(client_socket, addr)
-                )
-                client_thread.daemon = True
-                client_thread.start()
-                
+            self.server = await asyncio.start_server(
+                self.handle_client, self.host, self.port, backlog=LISTEN_BACKLOG
+            )
         except Exception as e:
-            self.logger.error(f"Server error: {str(e)}")
+            self.logger.error("Server error: %s", e)
+            return
+        self.logger.info("Tracker started on %s:%s", self.host, self.port)
+        
+        flush_task = asyncio.create_task(self._flush_loop())
+        try:
+            await self._stopping.wait()
         finally:
-            if self.server_socket:
-                self.server_socket.close()
-                
-    def handle_client(self, client_socket, addr):
-        """Handle client connection and commands"""
+            self.server.close()
+            # Close open connections so their handlers finish on EOF instead of
+            # being cancelled when the event loop shuts down
+            for writer in self._clients.values():
+                writer.close()
+            if self._clients:
+                await asyncio.wait(list(self._clients))
+            flush_task.cancel()
+            try:
+                await flush_task
+            except asyncio.CancelledError:
+                pass
+            await self.flush_peers()
+            self._loop = None
+            self.logger.info("Tracker server stopped")
+            
+    def start(self):
+        """Start the tracker server, using uvloop when it is installed"""
+        if uvloop is not None:
+            uvloop.run(self.serve())
+        else:
+            asyncio.run(self.serve())
+            
+    async def handle_client(self, reader, writer):
+        """Handle client connection and commands
+        
+        A connection stays open for any number of length-prefixed requests
+        until the client closes it or it stays idle longer than IDLE_TIMEOUT.
+        Connections beyond MAX_CONNECTIONS and requests larger than
+        MAX_MESSAGE_SIZE are refused, so a misbehaving peer cannot exhaust
+        the tracker's memory.
+        """
+        addr = writer.get_extra_info('peername')
+        if self._connection_count >= MAX_CONNECTIONS:
+            self.logger.warning("Refusing connection from %s:%s, too many open connections", addr[0], addr[1])
+            writer.close()
+            return
+        self._connection_count += 1
+        self._clients[asyncio.current_task()] = writer
         try:
-            # Receive data from client
-            data = b''
+            self.logger.info("New connection from %s:%s", addr[0], addr[1])
+            
+            # Detect dead peers on long-lived connections; TCP_NODELAY is already
+            # set on every TCP transport by asyncio and uvloop
+            sock = writer.get_extra_info('socket')
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            
             while True:
-                chunk = client_socket.recv(4096)
-                if not chunk:
-                    break
-                data += chunk
-                
-                # Check if we've received a complete JSON object
+                # Receive the next framed request
                 try:
-                    decoded_data = data.decode('utf-8')
-                    json.loads(decoded_data)  # Test if valid JSON
-                    break  # If we can parse it, we've received the full message
-                except (json.JSONDecodeError, UnicodeDecodeError):
-                    continue  # Not complete JSON, wait for more data
-                    
-            if not data:
-                return
-                
-            # Parse the command
-            try:
-                command_data = json.loads(data.decode('utf-8'))
-                command = command_data.get('command')
-                
-                if command == 'submit_info':
-                    response = self.handle_submit_info(command_data, addr)
-                elif command == 'get_list':
-                    response = self.handle_get_list(command_data)
-                else:
-                    response = {"status": "error", "message": "Unknown command"}
-                    
-                # Send response
-                client_socket.sendall(json.dumps(response).encode('utf-8'))
-                self.logger.info(f"Sent response for command {command}")
+                    header = await asyncio.wait_for(reader.readexactly(HEADER.size), IDLE_TIMEOUT)
+                except asyncio.IncompleteReadError:
+                    break  # Client closed the connection
+                (length,) = HEADER.unpack(header)
+                if length > MAX_MESSAGE_SIZE:
+                    self.logger.error("Rejecting %d byte request from %s:%s", length, addr[0], addr[1])
+                    break
+                data = await asyncio.wait_for(reader.readexactly(length), IDLE_TIMEOUT)
                 
-            except json.JSONDecodeError:
-                error_msg = {"status": "error", "message": "Invalid JSON format"}
-                client_socket.sendall(json.dumps(error_msg).encode('utf-8'))
-                self.logger.error("Received invalid JSON data")
+                self.send_message(writer, self.process_request(data, addr))
+                await writer.drain()
                 
+        except asyncio.TimeoutError:
+            self.logger.info("Closing idle connection from %s:%s", addr[0], addr[1])
         except Exception as e:
-            self.logger.error(f"Error handling client: {str(e)}")
+            self.logger.error("Error handling client: %s", e)
         finally:
-            client_socket.close()
+            self._connection_count -= 1
+            self._clients.pop(asyncio.current_task(), None)
+            writer.close()
+            
+    def process_request(self, data, addr):
+        """Parse one request body, run its command and return the response"""
+        try:
+            command_data = orjson.loads(data)
+            command = command_data.get('command')
+            
+            # Non-string commands (e.g. a JSON list) cannot be looked up in the table
+            handler = self.dispatch.get(command) if isinstance(command, str) else None
+            if handler is None:
+                response = UNKNOWN_COMMAND_RESPONSE
+            else:
+                response = handler(command_data, addr)
+                
+            self.logger.debug("Handled command %s", command)
+            return response
+            
+        except orjson.JSONDecodeError:
+            self.logger.error("Received invalid JSON data")
+            return INVALID_JSON_RESPONSE
+            
+    def send_message(self, writer, message):
+        """Queue a length-prefixed JSON message (or already serialized bytes) for the client"""
+        payload = message if isinstance(message, bytes) else orjson.dumps(message)
+        # Hand header and payload over separately so they are not concatenated
+        writer.writelines((HEADER.pack(len(payload)), payload))
             
     def handle_submit_info(self, data, addr):
         """Handle submit_info command to register a peer"""
         try:
             peer_port = data.get('port')
             username = data.get('username')
-            session_id = data.get('session_id', datetime.now().strftime("%Y%m%d%H%M%S"))
-            
-            # Generate unique peer ID
-            peer_id = f"{addr[0]}:{peer_port}:{username}:{session_id}"
-            
-            # Add to peers list with thread safety
-            with self.lock:
-                self.peers[peer_id] = {
-                    'ip': addr[0],
-                    'port': peer_port,
-                    'username': username,
-                    'session_id': session_id,
-                    'last_seen': datetime.now().isoformat()
-                }
-                self.save_peers()  # Save to file
+            now = datetime.now()
+            session_id = data.get('session_id')
+            if session_id is None:
+                session_id = now.strftime("%Y%m%d%H%M%S")
+            
+            # Reuse the ID of a peer registering again, otherwise generate a short random one
+            identity = (addr[0], peer_port, username, session_id)
+            try:
+                peer_id = self._peer_ids.get(identity)
+            except TypeError:
+                # A list or object field makes the identity key unhashable
+                self.logger.error("Invalid field type in submit_info from %s", addr[0])
+                return {"status": "error", "message": "Invalid field type: port, username and session_id must not be lists or objects"}
+            if peer_id is None:
+                peer_id = secrets.token_hex(8)
+                self._peer_ids[identity] = peer_id
+            
+            # Add to peers list; handlers run on the event loop so no lock is needed
+            self.peers[peer_id] = {
+                'ip': addr[0],
+                'port': peer_port,
+                'username': username,
+                'session_id': session_id,
+                'last_seen': now  # orjson serializes datetime natively in ISO 8601
+            }
+            self._dirty = True  # Saved to file by the background flusher
+            self._peer_list_cache = None
                 
-            self.logger.info(f"Registered new peer: {peer_id}")
+            self.logger.info("Registered new peer: %s", peer_id)
             return {"status": "success", "peer_id": peer_id}
             
         except KeyError as e:
-            self.logger.error(f"Missing required field in submit_info: {str(e)}")
+            self.logger.error("Missing required field in submit_info: %s", e)
             return {"status": "error", "message": f"Missing required field: {str(e)}"}
             
-    def handle_get_list(self, data):
-        """Handle get_list command to return peer list"""
+    def handle_get_list(self, data, addr):
+        """Handle get_list command to return peer list
+        
+        The serialized response is cached until the peer list changes, so
+        repeated polls are answered without re-encoding every peer.
+        """
         # Optional filtering criteria could be added here
-        with self.lock:
-            return {
+        if self._peer_list_cache is None:
+            self._peer_list_cache = orjson.dumps({
                 "status": "success",
                 "peers": self.peers
-            }
+            })
+        return self._peer_list_cache
             
     def stop(self):
-        """Stop the tracker server"""
-        if self.server_socket:
-            self.server_socket.close()
-            self.logger.info("Tracker server stopped")
+        """Stop the tracker server; safe to call from any thread"""
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            loop.call_soon_threadsafe(self._stopping.set)
             
 if __name__ == "__main__":
     tracker = Tracker()
@@ -0,0 +1,173 @@
+import gzip
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import orjson
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src', 'client', 'utils'))
+
+from sync_manager import SyncManager, _gzip_ndjson
+
+
+class SyncManagerCacheTest(unittest.TestCase):
+    """Channel caches on disk: JSON Lines storage and legacy migration"""
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.manager = SyncManager('http://127.0.0.1:1', self._tmpdir.name)
+        self.channels_dir = os.path.join(self._tmpdir.name, 'channels')
+
+    def tearDown(self):
+        self.manager.close()
+        self._tmpdir.cleanup()
+
+    def _path(self, filename):
+        return os.path.join(self.channels_dir, filename)
+
+    def test_legacy_cache_is_migrated_before_jsonl_messages(self):
+        with open(self._path('c.json'), 'wb') as f:
+            f.write(orjson.dumps([{'message_id': 1}, {'message_id': 2}]))
+        with open(self._path('c.jsonl'), 'wb') as f:
+            f.write(b'{"message_id":3}\n')
+
+        messages = self.manager._load_channel_cache('c')
+
+        self.assertEqual([m['message_id'] for m in messages], [1, 2, 3])
+        self.assertFalse(os.path.exists(self._path('c.json')))
+        with open(self._path('c.jsonl'), 'rb') as f:
+            self.assertEqual([orjson.loads(line)['message_id'] for line in f], [1, 2, 3])
+
+    def test_cache_message_migrates_legacy_cache_first(self):
+        with open(self._path('c.json'), 'wb') as f:
+            f.write(orjson.dumps([{'message_id': 1}]))
+
+        self.manager.cache_message('c', {'message_id': 2})
+
+        self.assertFalse(os.path.exists(self._path('c.json')))
+        self.assertEqual([m['message_id'] for m in self.manager._load_channel_cache('c')], [1, 2])
+
+    def test_corrupt_legacy_cache_is_left_in_place(self):
+        with open(self._path('c.json'), 'wb') as f:
+            f.write(b'[{"message_id": 1},')
+
+        self.assertEqual(self.manager._load_channel_cache('c'), [])
+        self.assertTrue(os.path.exists(self._path('c.json')))
+
+    def test_corrupt_line_is_skipped(self):
+        with open(self._path('c.jsonl'), 'wb') as f:
+            f.write(b'{"message_id":1}\n{"message_id":\n\n{"message_id":3}\n')
+
+        messages = self.manager._load_channel_cache('c')
+
+        self.assertEqual([m['message_id'] for m in messages], [1, 3])
+
+    def test_clear_cache_removes_both_formats(self):
+        for filename in ('a.json', 'a.jsonl', 'b.json', 'b.jsonl'):
+            open(self._path(filename), 'wb').close()
+
+        self.manager.clear_cache('a')
+        self.assertEqual(sorted(os.listdir(self.channels_dir)), ['b.json', 'b.jsonl'])
+
+        self.manager.clear_cache()
+        self.assertEqual(os.listdir(self.channels_dir), [])
+
+
+class SyncManagerOnlineTest(unittest.TestCase):
+    """sync_online merging server messages with the local cache"""
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.manager = SyncManager('http://127.0.0.1:1', self._tmpdir.name)
+
+    def tearDown(self):
+        self.manager.close()
+        self._tmpdir.cleanup()
+
+    def _sync(self, server_messages):
+        with mock.patch.object(self.manager, '_get_server_messages', return_value=server_messages):
+            return self.manager.sync_online('u', 'c')
+
+    def test_server_copy_wins_and_cache_only_messages_are_kept(self):
+        self.manager.cache_message('c', {'message_id': 1, 'timestamp': '1', 'text': 'cached'})
+        self.manager.cache_message('c', {'message_id': 3, 'timestamp': '3', 'text': 'unsynced'})
+        self.manager.cache_message('c', {'timestamp': '4', 'sender_id': 'u'})
+        self.manager.cache_message('c', {'timestamp': '4', 'sender_id': 'u'})
+
+        merged = self._sync([
+            {'message_id': 1, 'timestamp': '1', 'text': 'server'},
+            {'message_id': 2, 'timestamp': '2', 'text': 'server'},
+        ])
+
+        self.assertEqual([m.get('message_id') for m in merged], [1, 2, 3, None])
+        self.assertEqual(merged[0]['text'], 'server')
+        self.assertEqual(self.manager._load_channel_cache('c'), merged)
+
+    def test_unsorted_input_is_merged_in_timestamp_order(self):
+        self.manager.cache_message('c', {'message_id': 'd', 'timestamp': '4'})
+        self.manager.cache_message('c', {'message_id': 'a', 'timestamp': '1'})
+
+        merged = self._sync([
+            {'message_id': 'e', 'timestamp': '5'},
+            {'message_id': 'b', 'timestamp': '2'},
+            {'message_id': 'c', 'timestamp': '3'},
+        ])
+
+        self.assertEqual([m['message_id'] for m in merged], ['a', 'b', 'c', 'd', 'e'])
+
+    def test_sorted_input_is_not_reordered(self):
+        server_messages = [{'message_id': i, 'timestamp': str(i)} for i in range(5)]
+
+        self.assertEqual(self._sync(server_messages), server_messages)
+
+
+class SyncManagerOfflineTest(unittest.TestCase):
+    """sync_offline streaming the cache as gzip-compressed NDJSON"""
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.manager = SyncManager('http://127.0.0.1:1', self._tmpdir.name)
+
+    def tearDown(self):
+        self.manager.close()
+        self._tmpdir.cleanup()
+
+    def test_gzip_ndjson_round_trip(self):
+        messages = [{'message_id': i, 'text': 'hello ' * i} for i in range(100)]
+
+        body = gzip.decompress(b''.join(_gzip_ndjson(messages)))
+
+        self.assertEqual([orjson.loads(line) for line in body.splitlines()], messages)
+        self.assertEqual(gzip.decompress(b''.join(_gzip_ndjson([]))), b'')
+
+    def test_empty_cache_does_not_post(self):
+        with mock.patch.object(self.manager._session, 'post') as post:
+            self.assertTrue(self.manager.sync_offline('u', 'c'))
+        post.assert_not_called()
+
+    def test_cached_messages_are_streamed_to_the_server(self):
+        messages = [{'message_id': i, 'timestamp': str(i)} for i in range(3)]
+        for message in messages:
+            self.manager.cache_message('c', message)
+        uploaded = []
+
+        def post(url, data, headers, **kwargs):
+            uploaded.extend(orjson.loads(line) for line in gzip.decompress(b''.join(data)).splitlines())
+            response = mock.Mock(is_redirect=False)
+            response.raise_for_status.return_value = None
+            return response
+
+        with mock.patch.object(self.manager._session, 'post', side_effect=post) as patched:
+            self.assertTrue(self.manager.sync_offline('u', 'c'))
+
+        self.assertEqual(uploaded, messages)
+        _, kwargs = patched.call_args
+        self.assertEqual(kwargs['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(kwargs['headers']['Content-Type'], 'application/x-ndjson')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import sys
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src', 'server'))
+sys.path.insert(0, os.path.join(ROOT, 'src', 'client', 'network'))
+
+import tracker
+from tracker_protocol import TrackerProtocol
+
+
+class TrackerLoopbackTest(unittest.TestCase):
+    """Run a real tracker on 127.0.0.1 and talk to it with TrackerProtocol"""
+
+    def setUp(self):
+        # The tracker writes peers.json and tracker.log to the working directory
+        self._cwd = os.getcwd()
+        self._tmpdir = tempfile.TemporaryDirectory()
+        os.chdir(self._tmpdir.name)
+        self._idle_timeout = tracker.IDLE_TIMEOUT
+
+        self.tracker = tracker.Tracker('127.0.0.1', 0)
+        self.thread = threading.Thread(target=self.tracker.start, daemon=True)
+        self.thread.start()
+        deadline = time.monotonic() + 5
+        while self.tracker.server is None or self.tracker._loop is None:
+            if time.monotonic() > deadline:
+                self.fail("Tracker did not start")
+            time.sleep(0.01)
+        self.port = self.tracker.server.sockets[0].getsockname()[1]
+        self.client = TrackerProtocol('127.0.0.1', self.port)
+
+    def tearDown(self):
+        self.client.close()
+        self.tracker.stop()
+        self.thread.join(5)
+        tracker.IDLE_TIMEOUT = self._idle_timeout
+        os.chdir(self._cwd)
+        self._tmpdir.cleanup()
+
+    def test_submit_info_then_get_list_on_one_connection(self):
+        response = self.client.submit_info(5000, 'alice', 's1')
+        self.assertEqual(response['status'], 'success')
+
+        peers = self.client.get_list()
+        self.assertEqual(self.client.parse_peer_list(peers), [('127.0.0.1', 5000, 'alice', 's1')])
+        # Both requests went over the same pooled socket
+        self.assertEqual(self.client._pool.qsize(), 1)
+        self.assertEqual(self.tracker._connection_count, 1)
+
+    def test_reregistration_keeps_peer_id(self):
+        first = self.client.submit_info(5000, 'alice', 's1')
+        second = self.client.submit_info(5000, 'alice', 's1')
+        other = self.client.submit_info(5001, 'bob', 's2')
+
+        self.assertEqual(first['peer_id'], second['peer_id'])
+        self.assertNotEqual(first['peer_id'], other['peer_id'])
+        self.assertEqual(len(self.client.get_list()), 2)
+
+    def test_stale_pooled_connection_is_retried(self):
+        tracker.IDLE_TIMEOUT = 0.2
+        self.assertEqual(self.client.submit_info(5000, 'alice', 's1')['status'], 'success')
+
+        # Let the tracker close the idle pooled socket, then reuse it
+        time.sleep(0.6)
+        self.assertEqual(self.tracker._connection_count, 0)
+        self.assertEqual(len(self.client.get_list()), 1)
+
+    def test_oversized_frame_is_rejected(self):
+        with socket.create_connection(('127.0.0.1', self.port), timeout=5) as sock:
+            sock.sendall(tracker.HEADER.pack(tracker.MAX_MESSAGE_SIZE + 1))
+            self.assertEqual(sock.recv(1), b'')
+
+
+if __name__ == '__main__':
+    unittest.main()